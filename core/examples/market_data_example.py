@@ -7,11 +7,13 @@ process market data for portfolio optimization.
 """
 
 import os
+import io
 import asyncio
-import json
+import logging
+import logging.handlers
 from datetime import datetime, timedelta
-import pandas as pd
-import matplotlib.pyplot as plt
+from typing import Dict, List, Optional, TextIO, Tuple
+import numpy as np
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
@@ -29,102 +31,149 @@ supabase_url = os.environ.get("SUPABASE_URL")
 supabase_key = os.environ.get("SUPABASE_KEY")
 supabase = create_client(supabase_url, supabase_key)
 
-async def display_market_metrics_summary(market_data: MarketData):
+logger = logging.getLogger(__name__)
+
+def configure_logging() -> logging.Handler:
+    """Send example output through a MemoryHandler so writes to stdout are batched."""
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter('%(message)s'))
+    memory_handler = logging.handlers.MemoryHandler(capacity=1024, target=stream_handler)
+    logger.addHandler(memory_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return memory_handler
+
+# Per-run cache of in-flight/completed get_market_metrics() calls, keyed on asset_types
+_metrics_cache: Dict[Tuple[str, ...], asyncio.Future] = {}
+
+async def fetch_metrics(market_data: MarketData, asset_types: Optional[List[str]] = None) -> MarketMetrics:
+    """Fetch market metrics once per asset_types filter and reuse the result for the rest of the run."""
+    key = tuple(sorted(asset_types or []))
+    future = _metrics_cache.get(key)
+    if future is None:
+        future = asyncio.ensure_future(market_data.get_market_metrics(asset_types=asset_types))
+        _metrics_cache[key] = future
+    return await future
+
+def clear_metrics_cache():
+    """Drop cached market metrics so the next run fetches fresh data."""
+    _metrics_cache.clear()
+
+async def display_market_metrics_summary(market_data: MarketData, out: Optional[TextIO] = None):
     """Display a summary of market metrics."""
-    print("\n=== Market Metrics Summary ===\n")
+    out = out or sys.stdout
+    print("\n=== Market Metrics Summary ===\n", file=out)
     
     # Get all market metrics
-    metrics = await market_data.get_market_metrics()
+    metrics = await fetch_metrics(market_data)
     
     # Print summary counts
-    print(f"Total assets: {metrics.total_count}")
-    print(f"Drift vaults: {len(metrics.drift_vaults)}")
-    print(f"Yield pools: {len(metrics.yield_pools)}")
-    print(f"Lending pools: {len(metrics.lending_pools)}")
-    print(f"ABS vaults: {len(metrics.abs_vaults)}")
+    print(f"Total assets: {metrics.total_count}", file=out)
+    print(f"Drift vaults: {len(metrics.drift_vaults)}", file=out)
+    print(f"Yield pools: {len(metrics.yield_pools)}", file=out)
+    print(f"Lending pools: {len(metrics.lending_pools)}", file=out)
+    print(f"ABS vaults: {len(metrics.abs_vaults)}", file=out)
     
     # Calculate average APY by asset type
-    if metrics.drift_vaults:
-        avg_apy = sum(dv.apy for dv in metrics.drift_vaults) / len(metrics.drift_vaults)
-        print(f"Average drift vault APY: {avg_apy:.2%}")
-    
-    if metrics.yield_pools:
-        avg_apy = sum(yp.apy for yp in metrics.yield_pools) / len(metrics.yield_pools)
-        print(f"Average yield pool APY: {avg_apy:.2%}")
-    
-    if metrics.lending_pools:
-        avg_apy = sum(lp.apy for lp in metrics.lending_pools) / len(metrics.lending_pools)
-        print(f"Average lending pool APY: {avg_apy:.2%}")
-    
-    if metrics.abs_vaults:
-        avg_apy = sum(av.apy for av in metrics.abs_vaults) / len(metrics.abs_vaults)
-        print(f"Average ABS vault APY: {avg_apy:.2%}")
+    for label, assets in (
+        ("drift vault", metrics.drift_vaults),
+        ("yield pool", metrics.yield_pools),
+        ("lending pool", metrics.lending_pools),
+        ("ABS vault", metrics.abs_vaults),
+    ):
+        if assets:
+            avg_apy = np.fromiter((asset.apy for asset in assets), dtype=np.float64, count=len(assets)).mean()
+            print(f"Average {label} APY: {avg_apy:.2%}", file=out)
 
-async def display_single_asset_details(market_data: MarketData):
+async def display_single_asset_details(market_data: MarketData, out: Optional[TextIO] = None):
     """Display details for a sample asset of each type."""
-    print("\n=== Sample Asset Details ===\n")
+    out = out or sys.stdout
+    print("\n=== Sample Asset Details ===\n", file=out)
     
     # Get all market metrics first
-    metrics = await market_data.get_market_metrics()
+    metrics = await fetch_metrics(market_data)
     
     # Display a sample drift vault if available
     if metrics.drift_vaults:
-        print("\n--- Sample Drift Vault ---\n")
+        print("\n--- Sample Drift Vault ---\n", file=out)
         sample_asset = metrics.drift_vaults[0]
         asset_id = sample_asset.address
         
         # Get detailed metrics for this asset
         asset_metrics = await market_data.get_single_asset_metrics(asset_id, 'drift_vault')
         
-        print(f"Name: {asset_metrics.name}")
-        print(f"Address: {asset_metrics.address}")
-        print(f"Strategy: {asset_metrics.strategy}")
-        print(f"TVL: ${asset_metrics.tvl:,.2f}")
-        print(f"APY: {asset_metrics.apy:.2%}")
-        print(f"Volatility: {asset_metrics.volatility:.2%}")
-        print(f"Organization: {asset_metrics.org_name}")
-        print(f"Token: {asset_metrics.token_symbol}")
+        print(f"Name: {asset_metrics.name}", file=out)
+        print(f"Address: {asset_metrics.address}", file=out)
+        print(f"Strategy: {asset_metrics.strategy}", file=out)
+        print(f"TVL: ${asset_metrics.tvl:,.2f}", file=out)
+        print(f"APY: {asset_metrics.apy:.2%}", file=out)
+        print(f"Volatility: {asset_metrics.volatility:.2%}", file=out)
+        print(f"Organization: {asset_metrics.org_name}", file=out)
+        print(f"Token: {asset_metrics.token_symbol}", file=out)
     
     # Display a sample yield pool if available
     if metrics.yield_pools:
-        print("\n--- Sample Yield Pool ---\n")
+        print("\n--- Sample Yield Pool ---\n", file=out)
         sample_asset = metrics.yield_pools[0]
         asset_id = sample_asset.address
         
         # Get detailed metrics for this asset
         asset_metrics = await market_data.get_single_asset_metrics(asset_id, 'yield_pool')
         
-        print(f"Name: {asset_metrics.name}")
-        print(f"Address: {asset_metrics.address}")
-        print(f"Protocol: {asset_metrics.protocol}")
-        print(f"Chain: {asset_metrics.chain}")
-        print(f"TVL: ${asset_metrics.tvl:,.2f}")
-        print(f"APY: {asset_metrics.apy:.2%}")
-        print(f"Organization: {asset_metrics.org_name}")
-        print(f"Token: {asset_metrics.token_symbol}")
+        print(f"Name: {asset_metrics.name}", file=out)
+        print(f"Address: {asset_metrics.address}", file=out)
+        print(f"Protocol: {asset_metrics.protocol}", file=out)
+        print(f"Chain: {asset_metrics.chain}", file=out)
+        print(f"TVL: ${asset_metrics.tvl:,.2f}", file=out)
+        print(f"APY: {asset_metrics.apy:.2%}", file=out)
+        print(f"Organization: {asset_metrics.org_name}", file=out)
+        print(f"Token: {asset_metrics.token_symbol}", file=out)
+
+def save_time_series_chart(x, y, title: str, ylabel: str, path: str, y_formatter=None):
+    """Render a single time series to a PNG file.
+    
+    Uses a standalone Figure (Agg canvas) instead of pyplot, so no GUI backend is
+    initialised and the figure is freed as soon as it goes out of scope.
+    """
+    # Imported lazily so runs that never plot don't pay matplotlib's import cost
+    from matplotlib.figure import Figure
+    
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.plot(x, y)
+    ax.set_title(title)
+    ax.set_xlabel("Date")
+    ax.set_ylabel(ylabel)
+    if y_formatter is not None:
+        ax.yaxis.set_major_formatter(y_formatter)
+    ax.grid(True)
+    fig.tight_layout()
+    fig.savefig(path)
 
-async def analyze_historical_performance(market_data: MarketData):
+async def analyze_historical_performance(market_data: MarketData, out: Optional[TextIO] = None):
     """Analyze historical performance for a sample asset."""
-    print("\n=== Historical Performance Analysis ===\n")
+    out = out or sys.stdout
+    print("\n=== Historical Performance Analysis ===\n", file=out)
     
-    # Get a sample asset ID
-    metrics = await market_data.get_market_metrics(asset_types=['drift_vault'])
+    # Get a sample asset ID from the shared, unfiltered metrics fetch
+    metrics = await fetch_metrics(market_data)
     
     if not metrics.drift_vaults:
-        print("No drift vaults found to analyze")
+        print("No drift vaults found to analyze", file=out)
         return
     
     sample_asset = metrics.drift_vaults[0]
     asset_id = sample_asset.address
     asset_name = sample_asset.name
     
-    print(f"Analyzing historical performance for: {asset_name} ({asset_id})")
+    print(f"Analyzing historical performance for: {asset_name} ({asset_id})", file=out)
     
     # Set date range for last 90 days
     end_date = datetime.now()
     start_date = end_date - timedelta(days=90)
     
     # Get historical data
+    # NOTE: get_market_data is still the commented-out draft in src/models/market_data.py
     historical_data = await market_data.get_market_data(
         asset_ids=[asset_id],
         start_date=start_date,
@@ -133,72 +182,62 @@ async def analyze_historical_performance(market_data: MarketData):
     )
     
     if asset_id not in historical_data:
-        print("No historical data found for this asset")
+        print("No historical data found for this asset", file=out)
         return
     
     df = historical_data[asset_id]
     
+    # Compute all column means in a single pass over the frame
+    stat_columns = ['tvl', 'apy'] + (['max_drawdown'] if 'max_drawdown' in df.columns else [])
+    stats = df[stat_columns].mean()
+    
     # Print summary statistics
-    print("\nSummary Statistics:")
-    print(f"Data points: {len(df)}")
-    print(f"Average TVL: ${df['tvl'].mean():,.2f}")
-    print(f"Average APY: {df['apy'].mean():.2%}")
+    print("\nSummary Statistics:", file=out)
+    print(f"Data points: {len(df)}", file=out)
+    print(f"Average TVL: ${stats['tvl']:,.2f}", file=out)
+    print(f"Average APY: {stats['apy']:.2%}", file=out)
     
-    if 'max_drawdown' in df.columns:
-        print(f"Average Max Drawdown: {df['max_drawdown'].mean():.2%}")
+    if 'max_drawdown' in stats:
+        print(f"Average Max Drawdown: {stats['max_drawdown']:.2%}", file=out)
     
     # Plot TVL over time
-    plt.figure(figsize=(10, 6))
-    plt.plot(df.index, df['tvl'])
-    plt.title(f"TVL Over Time - {asset_name}")
-    plt.xlabel("Date")
-    plt.ylabel("TVL ($)")
-    plt.grid(True)
-    plt.tight_layout()
-    
-    # Save the plot
-    plt.savefig("tvl_over_time.png")
-    print("TVL chart saved as 'tvl_over_time.png'")
+    save_time_series_chart(df.index, df['tvl'], f"TVL Over Time - {asset_name}", "TVL ($)", "tvl_over_time.png")
+    print("TVL chart saved as 'tvl_over_time.png'", file=out)
     
     # Plot APY over time
-    plt.figure(figsize=(10, 6))
-    plt.plot(df.index, df['apy'] * 100)  # Convert to percentage
-    plt.title(f"APY Over Time - {asset_name}")
-    plt.xlabel("Date")
-    plt.ylabel("APY (%)")
-    plt.grid(True)
-    plt.tight_layout()
-    
-    # Save the plot
-    plt.savefig("apy_over_time.png")
-    print("APY chart saved as 'apy_over_time.png'")
+    from matplotlib.ticker import PercentFormatter
+    
+    # APY is stored as a fraction; let the axis formatter render percentages instead of scaling the series
+    save_time_series_chart(
+        df.index, df['apy'], f"APY Over Time - {asset_name}", "APY (%)", "apy_over_time.png",
+        y_formatter=PercentFormatter(xmax=1.0)
+    )
+    print("APY chart saved as 'apy_over_time.png'", file=out)
 
-async def display_portfolio_composition(market_data: MarketData):
+async def display_portfolio_composition(market_data: MarketData, out: Optional[TextIO] = None):
     """Display the composition of a sample portfolio."""
-    print("\n=== Portfolio Composition ===\n")
+    out = out or sys.stdout
+    print("\n=== Portfolio Composition ===\n", file=out)
     
-    # Get all ABS vaults
-    metrics = await market_data.get_market_metrics(asset_types=['abs_vault'])
+    # ABS vaults come from the same cached metrics fetch as the summary section,
+    # so this does not add a round trip
+    metrics = await fetch_metrics(market_data)
     
     if not metrics.abs_vaults:
-        print("No ABS vaults found to analyze")
+        print("No ABS vaults found to analyze", file=out)
         return
     
     # Find a vault with allocations
-    portfolio_vault = None
-    for vault in metrics.abs_vaults:
-        if vault.allocation_count > 0:
-            portfolio_vault = vault
-            break
+    portfolio_vault = next((vault for vault in metrics.abs_vaults if vault.allocation_count > 0), None)
     
     if not portfolio_vault:
-        print("No ABS vault with allocations found")
+        print("No ABS vault with allocations found", file=out)
         return
     
     portfolio_id = portfolio_vault.pool_id
     portfolio_name = portfolio_vault.name
     
-    print(f"Analyzing portfolio composition for: {portfolio_name} (ID: {portfolio_id})")
+    print(f"Analyzing portfolio composition for: {portfolio_name} (ID: {portfolio_id})", file=out)
     
     # Get current portfolio
     portfolio = await market_data.get_current_portfolio(
@@ -208,54 +247,70 @@ async def display_portfolio_composition(market_data: MarketData):
     )
     
     # Print portfolio summary
-    print(f"\nTotal Value: ${portfolio['total_value']:,.2f}")
-    print(f"Timestamp: {portfolio['timestamp']}")
-    print(f"Number of allocations: {len(portfolio['allocations'])}")
+    print(f"\nTotal Value: ${portfolio['total_value']:,.2f}", file=out)
+    print(f"Timestamp: {portfolio['timestamp']}", file=out)
+    print(f"Number of allocations: {len(portfolio['allocations'])}", file=out)
     
     # Print allocations
-    print("\nCurrent Allocations:")
-    for alloc in portfolio['allocations']:
-        asset_id = alloc['asset_id']
-        weight = alloc['weight']
-        value = alloc['value']
-        
-        print(f"Asset ID: {asset_id}")
-        print(f"  Weight: {weight:.2%}")
-        print(f"  Value: ${value:,.2f}")
-        print()
+    print("\nCurrent Allocations:", file=out)
+    out.write("".join(
+        f"Asset ID: {alloc['asset_id']}\n"
+        f"  Weight: {alloc['weight']:.2%}\n"
+        f"  Value: ${alloc['value']:,.2f}\n"
+        "\n"
+        for alloc in portfolio['allocations']
+    ))
     
     # Print historical allocation count if available
     if 'historical_allocations' in portfolio:
         history = portfolio['historical_allocations']
-        print(f"\nHistorical allocation data points: {len(history)}")
+        print(f"\nHistorical allocation data points: {len(history)}", file=out)
         
         if history:
             # Get the earliest and latest dates
             earliest_date = history[0]['date']
             latest_date = history[-1]['date']
             
-            print(f"Historical data from {earliest_date} to {latest_date}")
+            print(f"Historical data from {earliest_date} to {latest_date}", file=out)
 
 async def main():
     """Main function to demonstrate MarketData functionality."""
+    # Output goes through the logger, so set it up when main() is imported and called directly
+    if not logger.handlers:
+        configure_logging()
+    
     # Initialize MarketData with Supabase client
     market_data = MarketData(supabase)
     
+    # Each section writes into its own buffer so concurrent output stays readable
+    sections = [
+        display_market_metrics_summary,
+        display_single_asset_details,
+        analyze_historical_performance,
+        display_portfolio_composition,
+    ]
+    buffers = [io.StringIO() for _ in sections]
+    
     try:
-        # Display market metrics summary
-        await display_market_metrics_summary(market_data)
-        
-        # Display single asset details
-        await display_single_asset_details(market_data)
-        
-        # Analyze historical performance
-        await analyze_historical_performance(market_data)
+        # The sections are independent and I/O-bound, so run them concurrently
+        results = await asyncio.gather(
+            *(section(market_data, buffer) for section, buffer in zip(sections, buffers)),
+            return_exceptions=True
+        )
         
-        # Display portfolio composition
-        await display_portfolio_composition(market_data)
-        
-    except Exception as e:
-        print(f"Error: {str(e)}")
+        for buffer, result in zip(buffers, results):
+            logger.info(buffer.getvalue().removesuffix('\n'))
+            if isinstance(result, Exception):
+                logger.error("Error: %s", result)
+    finally:
+        clear_metrics_cache()
+        # Emit the buffered output now rather than when the MemoryHandler fills or closes
+        for handler in logger.handlers:
+            handler.flush()
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    log_handler = configure_logging()
+    try:
+        asyncio.run(main())
+    finally:
+        log_handler.close() 
\ No newline at end of file
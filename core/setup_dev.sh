@@ -28,6 +28,12 @@ fi
 
 echo "Using Python: $($PYTHON_CMD --version)"
 
+# The code uses @dataclass(slots=True), which needs Python 3.10+
+if ! $PYTHON_CMD -c 'import sys; sys.exit(sys.version_info < (3, 10))'; then
+    echo "Error: Python 3.10 or newer is required."
+    exit 1
+fi
+
 # Setup virtual environment
 VENV_DIR="venv"
 if [ ! -d "$VENV_DIR" ]; then
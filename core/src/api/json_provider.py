@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+orjson JSON Provider.
+
+This module defines a Flask JSON provider backed by orjson, so that
+``jsonify`` responses from the API blueprints are serialized by a native
+encoder instead of the standard library ``json`` module.
+
+Install it at app init:
+
+    app.json = ORJSONProvider(app)
+
+Compared with Flask's default provider, naive datetimes are written as
+ISO-8601 with a +00:00 offset (orjson's OPT_NAIVE_UTC) instead of RFC 822
+HTTP dates, and dates as plain YYYY-MM-DD strings.
+"""
+
+from decimal import Decimal
+from typing import Any, Union
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+_BASE_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+
+
+def _default(obj: Any) -> Any:
+    """Serialize types orjson does not handle natively."""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if hasattr(obj, 'to_dict'):
+        # Model dataclasses (MarketMetrics etc.) define their own representation
+        return obj.to_dict()
+    if hasattr(obj, 'tolist'):
+        # Non-contiguous numpy arrays and numpy scalars not covered by OPT_SERIALIZE_NUMPY
+        return obj.tolist()
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes with orjson."""
+
+    def _options(self, indent: bool = False) -> int:
+        option = _BASE_OPTIONS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize data as JSON to a string."""
+        return orjson.dumps(obj, default=_default, option=self._options(bool(kwargs.get('indent')))).decode()
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        """Deserialize data as JSON from a string or bytes."""
+        return orjson.loads(s)
@@ -6,25 +6,146 @@ This module defines the API routes for retrieving and processing market data
 for the Portfolio Optimization System.
 """
 
-from flask import Blueprint, request, jsonify, current_app
-from datetime import datetime
-import pandas as pd
-from typing import List, Dict, Any, Optional, Union
-import traceback
+from flask import Blueprint, Flask, Response, request, jsonify, current_app, stream_with_context
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from itertools import islice
+import hashlib
+import re
+import time
+import numpy as np
+import orjson
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple, Union
 
 # Create blueprint for market data routes
 market_data_bp = Blueprint('market_data', __name__, url_prefix='/api/data/market')
 
+# Shape of a YYYY-MM-DD date string
+_DATE_RE = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}\Z')
 
-def parse_comma_separated(param: Optional[str]) -> List[str]:
-    """Parse comma-separated string into a list of strings."""
+# Accepted values for the frequency and correlation method parameters
+_VALID_FREQUENCIES = ('daily', 'weekly', 'monthly')
+_VALID_FREQUENCY_SET = frozenset(_VALID_FREQUENCIES)
+
+_VALID_METHODS = ('pearson', 'spearman', 'kendall')
+_VALID_METHOD_SET = frozenset(_VALID_METHODS)
+
+# Validation error bodies, serialized once at import
+_ERR_MISSING_ASSETS = orjson.dumps({'error': 'Missing required parameter: assets'})
+_ERR_INVALID_START_DATE = orjson.dumps({
+    'error': 'Invalid or missing start_date parameter (YYYY-MM-DD format required)'
+})
+_ERR_INVALID_END_DATE = orjson.dumps({
+    'error': 'Invalid or missing end_date parameter (YYYY-MM-DD format required)'
+})
+_ERR_INVALID_DATE_RANGE = orjson.dumps({'error': 'Invalid date range: end_date must not be before start_date'})
+_ERR_INVALID_FREQUENCY = orjson.dumps({
+    'error': f'Invalid frequency parameter. Must be one of: {", ".join(_VALID_FREQUENCIES)}'
+})
+_ERR_INVALID_METHOD = orjson.dumps({
+    'error': f'Invalid method parameter. Must be one of: {", ".join(_VALID_METHODS)}'
+})
+_ERR_MALFORMED_JSON = orjson.dumps({'error': 'Malformed JSON in request body.'})
+_ERR_INVALID_BATCH_BODY = orjson.dumps({'error': 'Invalid request body. Must contain "requests" array.'})
+_ERR_REQUESTS_NOT_ARRAY = orjson.dumps({'error': '"requests" must be an array.'})
+
+
+def _placeholder_template(static: Dict[str, Any]) -> bytes:
+    """Serialize the static part of a placeholder body, leaving it open for a trailing "metadata" object."""
+    return orjson.dumps(static)[:-1] + b',"metadata":'
+
+
+# Placeholder payloads are the same on every call, so only their metadata is
+# serialized per request (see _template_response)
+_MARKET_DATA_TEMPLATE = _placeholder_template({
+    "data": {
+        "AAPL": {
+            "dates": ["2023-01-01", "2023-01-02", "2023-01-03"],
+            "prices": [150.25, 152.30, 151.45],
+            "returns": [0, 0.014, -0.006],
+            "volumes": [12500000, 13200000, 11800000]
+        }
+    }
+})
+_LATEST_TEMPLATE = _placeholder_template({
+    "data": {
+        "AAPL": {
+            "date": "2023-05-01",
+            "price": 155.75,
+            "return": 0.02,
+            "volume": 12800000
+        }
+    }
+})
+_METRICS_TEMPLATE = _placeholder_template({
+    "data": {
+        "AAPL": {
+            "volatility": 0.25,
+            "sharpe_ratio": 0.8,
+            "beta": 1.2,
+            "var_95": -0.03,
+            "max_drawdown": -0.15
+        }
+    },
+    "market_metrics": {
+        "correlation_matrix": {
+            "AAPL": {"AAPL": 1.0}
+        },
+        "market_volatility": 0.18,
+        "risk_free_rate": 0.04
+    }
+})
+
+
+# Cache-Control lifetimes (seconds) for GET responses. Closed ranges only change
+# on a backfill; revalidating them is a cheap 304, so their lifetime is kept short
+# enough that a backfill reaches clients and proxies within minutes
+_SHORT_MAX_AGE = 60
+_CLOSED_RANGE_MAX_AGE = 10 * 60
+
+# Mixed into every ETag; bump it when the response shape or the backing data
+# changes so clients holding an old ETag get the new body instead of a 304
+_RESPONSE_VERSION = b'1'
+
+# (epoch second, ISO string) of the last formatted metadata timestamp
+_now_iso_cache = (0, '')
+
+
+def _now_iso() -> str:
+    """Return the current time as an ISO string, formatting it at most once per second."""
+    global _now_iso_cache
+    second = int(time.time())
+    cached_second, cached_iso = _now_iso_cache
+    if second != cached_second:
+        cached_iso = datetime.fromtimestamp(second).isoformat()
+        # Rebinding a single tuple keeps the cache consistent across threads
+        _now_iso_cache = (second, cached_iso)
+    return cached_iso
+
+
+@lru_cache(maxsize=1024)
+def parse_comma_separated(param: Optional[str]) -> Tuple[str, ...]:
+    """Parse comma-separated string into a tuple of strings, skipping empty items."""
     if not param:
-        return []
-    return [item.strip() for item in param.split(',')]
+        return ()
+    return tuple(item for item in (token.strip() for token in param.split(',')) if item)
+
+
+@lru_cache(maxsize=1024)
+def parse_asset_list(param: Optional[str]) -> Tuple[str, ...]:
+    """Parse a comma-separated asset list, upper-casing symbols and dropping duplicates in order."""
+    return tuple(dict.fromkeys(asset.upper() for asset in parse_comma_separated(param)))
 
 
+@lru_cache(maxsize=4096)
 def validate_date_format(date_str: str) -> bool:
     """Validate that a string is in YYYY-MM-DD format."""
+    # Cheap shape check first; strptime only runs to reject impossible dates like 2023-13-40
+    if not _DATE_RE.match(date_str):
+        return False
     try:
         datetime.strptime(date_str, '%Y-%m-%d')
         return True
@@ -32,7 +153,45 @@ def validate_date_format(date_str: str) -> bool:
         return False
 
 
-@market_data_bp.route('', methods=['GET'])
+def _period_days(start_date: str, end_date: str) -> int:
+    """Number of days between two validated YYYY-MM-DD strings."""
+    start = date(int(start_date[:4]), int(start_date[5:7]), int(start_date[8:10]))
+    end = date(int(end_date[:4]), int(end_date[5:7]), int(end_date[8:10]))
+    return (end - start).days
+
+
+def _error_response(body: bytes, status: int = 400) -> Response:
+    """Build a JSON error response from a pre-serialized body."""
+    return Response(body, status=status, mimetype='application/json')
+
+
+def _template_response(template: bytes, metadata: Dict[str, Any]) -> Response:
+    """Build a JSON response from a pre-serialized template and its per-request metadata."""
+    return Response(template + orjson.dumps(metadata) + b'}', mimetype='application/json')
+
+
+def _cache_response(response: Response, max_age: int, payload: bytes) -> Response:
+    """
+    Mark a GET response as cacheable and answer conditional requests with 304.
+    
+    The ETag is derived from the serialized data payload rather than the whole
+    body, so per-request metadata such as timestamps does not make every ETag
+    unique. It is weak because the full bodies of two matching responses may
+    still differ in that metadata.
+    """
+    response.headers['Cache-Control'] = f'public, max-age={max_age}'
+    response.set_etag(hashlib.sha1(_RESPONSE_VERSION + payload).hexdigest(), weak=True)
+    return response.make_conditional(request)
+
+
+def _cache_range_response(response: Response, payload: bytes, end_date: str) -> Response:
+    """Apply caching headers to a date-range response; ranges that ended before today (UTC) rarely change."""
+    if end_date >= datetime.now(timezone.utc).date().isoformat():
+        return _cache_response(response, _SHORT_MAX_AGE, payload)
+    return _cache_response(response, _CLOSED_RANGE_MAX_AGE, payload)
+
+
+@market_data_bp.route('', methods=['GET'], strict_slashes=False)
 def get_market_data():
     """
     Get historical market data for specified assets and time period.
@@ -52,26 +211,27 @@ def get_market_data():
         frequency = request.args.get('frequency', 'daily')
         fields = request.args.get('fields')
         
-        # Validate required parameters
-        if not assets:
-            return jsonify({'error': 'Missing required parameter: assets'}), 400
+        # Validate required parameters; a list of only separators or blanks counts as missing
+        asset_list = parse_asset_list(assets)
+        if not asset_list:
+            return _error_response(_ERR_MISSING_ASSETS)
         
         if not start_date or not validate_date_format(start_date):
-            return jsonify({'error': 'Invalid or missing start_date parameter (YYYY-MM-DD format required)'}), 400
+            return _error_response(_ERR_INVALID_START_DATE)
         
         if not end_date or not validate_date_format(end_date):
-            return jsonify({'error': 'Invalid or missing end_date parameter (YYYY-MM-DD format required)'}), 400
+            return _error_response(_ERR_INVALID_END_DATE)
+        
+        # Validated YYYY-MM-DD strings order the same way as the dates they hold
+        if end_date < start_date:
+            return _error_response(_ERR_INVALID_DATE_RANGE)
         
         # Parse comma-separated parameters
-        asset_list = parse_comma_separated(assets)
         field_list = parse_comma_separated(fields)
         
         # Validate frequency
-        valid_frequencies = ['daily', 'weekly', 'monthly']
-        if frequency not in valid_frequencies:
-            return jsonify({
-                'error': f'Invalid frequency parameter. Must be one of: {", ".join(valid_frequencies)}'
-            }), 400
+        if frequency not in _VALID_FREQUENCY_SET:
+            return _error_response(_ERR_INVALID_FREQUENCY)
         
         # Here we would call the market data service to retrieve the actual data
         # For now, we'll return a placeholder response
@@ -86,33 +246,22 @@ def get_market_data():
         # )
         
         # Placeholder response
-        response = {
-            "data": {
-                "AAPL": {
-                    "dates": ["2023-01-01", "2023-01-02", "2023-01-03"],
-                    "prices": [150.25, 152.30, 151.45],
-                    "returns": [0, 0.014, -0.006],
-                    "volumes": [12500000, 13200000, 11800000]
-                }
-            },
-            "metadata": {
-                "frequency": frequency,
-                "source": "supabase",
-                "last_updated": datetime.now().isoformat(),
-                "count": len(asset_list),
-                "period_days": 30  # This would be calculated based on start and end dates
-            }
-        }
-        
-        return jsonify(response)
+        response = _template_response(_MARKET_DATA_TEMPLATE, {
+            "frequency": frequency,
+            "source": "supabase",
+            "last_updated": _now_iso(),
+            "count": len(asset_list),
+            "period_days": _period_days(start_date, end_date)
+        })
+        
+        return _cache_range_response(response, _MARKET_DATA_TEMPLATE, end_date)
     
     except Exception as e:
-        current_app.logger.error(f"Error in get_market_data: {str(e)}")
-        current_app.logger.error(traceback.format_exc())
+        current_app.logger.exception("Error in get_market_data")
         return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
 
 
-@market_data_bp.route('/latest', methods=['GET'])
+@market_data_bp.route('/latest', methods=['GET'], strict_slashes=False)
 def get_latest_market_data():
     """
     Get latest market data for specified assets.
@@ -126,12 +275,12 @@ def get_latest_market_data():
         assets = request.args.get('assets')
         fields = request.args.get('fields')
         
-        # Validate required parameters
-        if not assets:
-            return jsonify({'error': 'Missing required parameter: assets'}), 400
+        # Validate required parameters; a list of only separators or blanks counts as missing
+        asset_list = parse_asset_list(assets)
+        if not asset_list:
+            return _error_response(_ERR_MISSING_ASSETS)
         
         # Parse comma-separated parameters
-        asset_list = parse_comma_separated(assets)
         field_list = parse_comma_separated(fields)
         
         # Here we would call the market data service to retrieve the latest data
@@ -144,30 +293,19 @@ def get_latest_market_data():
         # )
         
         # Placeholder response
-        response = {
-            "data": {
-                "AAPL": {
-                    "date": "2023-05-01",
-                    "price": 155.75,
-                    "return": 0.02,
-                    "volume": 12800000
-                }
-            },
-            "metadata": {
-                "timestamp": datetime.now().isoformat(),
-                "source": "supabase"
-            }
-        }
+        response = _template_response(_LATEST_TEMPLATE, {
+            "timestamp": _now_iso(),
+            "source": "supabase"
+        })
         
-        return jsonify(response)
+        return _cache_response(response, _SHORT_MAX_AGE, _LATEST_TEMPLATE)
     
     except Exception as e:
-        current_app.logger.error(f"Error in get_latest_market_data: {str(e)}")
-        current_app.logger.error(traceback.format_exc())
+        current_app.logger.exception("Error in get_latest_market_data")
         return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
 
 
-@market_data_bp.route('/metrics', methods=['GET'])
+@market_data_bp.route('/metrics', methods=['GET'], strict_slashes=False)
 def get_market_metrics():
     """
     Get aggregated market metrics for specified assets.
@@ -185,18 +323,22 @@ def get_market_metrics():
         end_date = request.args.get('end_date')
         metrics = request.args.get('metrics')
         
-        # Validate required parameters
-        if not assets:
-            return jsonify({'error': 'Missing required parameter: assets'}), 400
+        # Validate required parameters; a list of only separators or blanks counts as missing
+        asset_list = parse_asset_list(assets)
+        if not asset_list:
+            return _error_response(_ERR_MISSING_ASSETS)
         
         if not start_date or not validate_date_format(start_date):
-            return jsonify({'error': 'Invalid or missing start_date parameter (YYYY-MM-DD format required)'}), 400
+            return _error_response(_ERR_INVALID_START_DATE)
         
         if not end_date or not validate_date_format(end_date):
-            return jsonify({'error': 'Invalid or missing end_date parameter (YYYY-MM-DD format required)'}), 400
+            return _error_response(_ERR_INVALID_END_DATE)
+        
+        # Validated YYYY-MM-DD strings order the same way as the dates they hold
+        if end_date < start_date:
+            return _error_response(_ERR_INVALID_DATE_RANGE)
         
         # Parse comma-separated parameters
-        asset_list = parse_comma_separated(assets)
         metric_list = parse_comma_separated(metrics)
         
         # Here we would call the market data service to calculate metrics
@@ -211,38 +353,186 @@ def get_market_metrics():
         # )
         
         # Placeholder response
-        response = {
-            "data": {
-                "AAPL": {
-                    "volatility": 0.25,
-                    "sharpe_ratio": 0.8,
-                    "beta": 1.2,
-                    "var_95": -0.03,
-                    "max_drawdown": -0.15
-                }
-            },
-            "market_metrics": {
-                "correlation_matrix": {
-                    "AAPL": {"AAPL": 1.0}
-                },
-                "market_volatility": 0.18,
-                "risk_free_rate": 0.04
-            },
-            "metadata": {
-                "period_days": 365,  # This would be calculated based on start and end dates
-                "calculation_time": datetime.now().isoformat()
-            }
-        }
+        response = _template_response(_METRICS_TEMPLATE, {
+            "period_days": _period_days(start_date, end_date),
+            "calculation_time": _now_iso()
+        })
         
-        return jsonify(response)
+        return _cache_range_response(response, _METRICS_TEMPLATE, end_date)
     
     except Exception as e:
-        current_app.logger.error(f"Error in get_market_metrics: {str(e)}")
-        current_app.logger.error(traceback.format_exc())
+        current_app.logger.exception("Error in get_market_metrics")
         return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
 
 
-@market_data_bp.route('/batch', methods=['POST'])
+@dataclass(slots=True)
+class BatchRequest:
+    """A single validated sub-request of a batch market data call."""
+    type: str
+    assets: List[str] = field(default_factory=list)
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    frequency: str = 'daily'
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BatchRequest':
+        """
+        Validate a request body item and create a BatchRequest from it.
+        
+        Assets are canonicalized like the GET endpoints' asset lists.
+        
+        Raises:
+            ValueError: If assets, a date or the frequency is invalid
+        """
+        assets = data.get('assets') or []
+        if not isinstance(assets, list) or not all(isinstance(asset, str) for asset in assets):
+            raise ValueError('"assets" must be an array of strings.')
+        
+        start_date = data.get('start_date')
+        end_date = data.get('end_date')
+        for name, value in (('start_date', start_date), ('end_date', end_date)):
+            if value is not None and not (isinstance(value, str) and validate_date_format(value)):
+                raise ValueError(f'Invalid {name} (YYYY-MM-DD format required).')
+        if start_date and end_date and end_date < start_date:
+            raise ValueError('Invalid date range: end_date must not be before start_date.')
+        
+        frequency = data.get('frequency', 'daily')
+        if not isinstance(frequency, str) or frequency not in _VALID_FREQUENCY_SET:
+            raise ValueError(f'Invalid frequency. Must be one of: {", ".join(_VALID_FREQUENCIES)}.')
+        
+        return cls(
+            type=data['type'],
+            assets=list(dict.fromkeys(asset.strip().upper() for asset in assets if asset.strip())),
+            start_date=start_date,
+            end_date=end_date,
+            frequency=frequency
+        )
+
+
+def _handle_historical_request(item: BatchRequest) -> Dict[str, Any]:
+    """Handle a 'historical' batch sub-request."""
+    # Here we would call get_historical_data from the service
+    return {
+        'type': 'historical',
+        'data': {
+            # Placeholder data
+            "AAPL": {
+                "dates": ["2023-01-01", "2023-01-02"],
+                "prices": [150.25, 152.30],
+                "returns": [0, 0.014]
+            }
+        }
+    }
+
+
+def _handle_metrics_request(item: BatchRequest) -> Dict[str, Any]:
+    """Handle a 'metrics' batch sub-request."""
+    # Here we would call calculate_metrics from the service
+    return {
+        'type': 'metrics',
+        'data': {
+            # Placeholder data
+            "AAPL": {
+                "volatility": 0.25,
+                "sharpe_ratio": 0.8
+            }
+        }
+    }
+
+
+def _handle_latest_request(item: BatchRequest) -> Dict[str, Any]:
+    """Handle a 'latest' batch sub-request."""
+    # Here we would call get_latest_data from the service
+    return {
+        'type': 'latest',
+        'data': {
+            # Placeholder data
+            "AAPL": {
+                "date": "2023-05-01",
+                "price": 155.75
+            }
+        }
+    }
+
+
+# Bounded pool for running batch sub-requests concurrently without exhausting database connections
+_BATCH_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix='market-data-batch')
+
+# Most sub-requests a single batch may have queued or running on the shared pool at once
+_BATCH_WINDOW = 16
+
+# Batch sub-request handlers keyed by request type
+_BATCH_HANDLERS = {
+    'historical': _handle_historical_request,
+    'metrics': _handle_metrics_request,
+    'latest': _handle_latest_request,
+}
+
+
+def _process_batch_request(req: Dict[str, Any], app: Flask) -> Dict[str, Any]:
+    """Validate a single batch sub-request and run its handler."""
+    # Validate request structure
+    if not isinstance(req, dict) or 'type' not in req:
+        return {
+            'error': 'Each request must specify a "type".',
+            'request': req
+        }
+    
+    # Process based on request type
+    req_type = req['type']
+    handler = _BATCH_HANDLERS.get(req_type) if isinstance(req_type, str) else None
+    if handler is None:
+        return {
+            'error': f'Unsupported request type: {req_type}',
+            'request': req
+        }
+    
+    try:
+        item = BatchRequest.from_dict(req)
+    except ValueError as e:
+        return {
+            'error': str(e),
+            'request': req
+        }
+    
+    # Capture failures per item so one bad sub-request doesn't fail the whole batch
+    try:
+        # Pool threads don't inherit the request's app context, so handlers get their own
+        with app.app_context():
+            return handler(item)
+    except Exception as e:
+        app.logger.exception("Error processing batch request of type %s", item.type)
+        return {
+            'error': 'Internal server error',
+            'message': str(e),
+            'request': req
+        }
+
+
+def _iter_batch_results(requests_array: Iterable[Any], app: Flask) -> Iterator[Dict[str, Any]]:
+    """
+    Run batch sub-requests on the shared pool and yield their results in input order.
+    
+    At most _BATCH_WINDOW sub-requests are submitted ahead of the consumer, so a
+    large batch neither floods the pool's queue in front of other requests nor
+    holds more than a window of finished results in memory.
+    """
+    items = iter(requests_array)
+    pending = deque(_BATCH_POOL.submit(_process_batch_request, req, app) for req in islice(items, _BATCH_WINDOW))
+    try:
+        while pending:
+            result = pending.popleft().result()
+            # Refill the slot that just freed up before handing the result on
+            for req in islice(items, 1):
+                pending.append(_BATCH_POOL.submit(_process_batch_request, req, app))
+            yield result
+    finally:
+        # The client went away or serialization failed; don't run work nobody will read
+        for future in pending:
+            future.cancel()
+
+
+@market_data_bp.route('/batch', methods=['POST'], strict_slashes=False)
 def batch_market_data():
     """
     Batch retrieve multiple types of market data in a single request.
@@ -262,98 +552,53 @@ def batch_market_data():
     }
     """
     try:
-        # Get request body as JSON
-        request_data = request.get_json()
+        # Decode the raw body with orjson; malformed JSON is a client error, not a 500
+        try:
+            request_data = orjson.loads(request.get_data(cache=False))
+        except orjson.JSONDecodeError:
+            return _error_response(_ERR_MALFORMED_JSON)
         
-        if not request_data or 'requests' not in request_data:
-            return jsonify({'error': 'Invalid request body. Must contain "requests" array.'}), 400
+        if not isinstance(request_data, dict) or 'requests' not in request_data:
+            return _error_response(_ERR_INVALID_BATCH_BODY)
         
         requests_array = request_data['requests']
         if not isinstance(requests_array, list):
-            return jsonify({'error': '"requests" must be an array.'}), 400
-        
-        # Process each request in the batch
-        start_time = datetime.now()
-        results = []
-        
-        for req in requests_array:
-            # Validate request structure
-            if 'type' not in req:
-                results.append({
-                    'error': 'Each request must specify a "type".',
-                    'request': req
-                })
-                continue
-            
-            req_type = req.get('type')
-            
-            # Process based on request type
-            if req_type == 'historical':
-                # Here we would call get_historical_data from the service
-                results.append({
-                    'type': 'historical',
-                    'data': {
-                        # Placeholder data
-                        "AAPL": {
-                            "dates": ["2023-01-01", "2023-01-02"],
-                            "prices": [150.25, 152.30],
-                            "returns": [0, 0.014]
-                        }
-                    }
-                })
+            return _error_response(_ERR_REQUESTS_NOT_ARRAY)
+        
+        # Stream the results so each one is serialized and sent as soon as it is ready
+        request_time = _now_iso()
+        start_ns = time.perf_counter_ns()
+        app = current_app._get_current_object()
+        
+        def generate():
+            yield b'{"results":['
+            try:
+                for i, result in enumerate(_iter_batch_results(requests_array, app)):
+                    # Serialize before emitting the separator so a failure never leaves a dangling comma
+                    item = orjson.dumps(result)
+                    yield b',' + item if i else item
+            except Exception as e:
+                current_app.logger.exception("Error in batch_market_data")
+                # Headers are already sent, so close the document with the error fields instead of a 500
+                error = orjson.dumps({'error': 'Internal server error', 'message': str(e)})
+                yield b'],' + error[1:]
+                return
             
-            elif req_type == 'metrics':
-                # Here we would call calculate_metrics from the service
-                results.append({
-                    'type': 'metrics',
-                    'data': {
-                        # Placeholder data
-                        "AAPL": {
-                            "volatility": 0.25,
-                            "sharpe_ratio": 0.8
-                        }
-                    }
-                })
-            
-            elif req_type == 'latest':
-                # Here we would call get_latest_data from the service
-                results.append({
-                    'type': 'latest',
-                    'data': {
-                        # Placeholder data
-                        "AAPL": {
-                            "date": "2023-05-01",
-                            "price": 155.75
-                        }
-                    }
-                })
-            
-            else:
-                results.append({
-                    'error': f'Unsupported request type: {req_type}',
-                    'request': req
-                })
-        
-        end_time = datetime.now()
-        processing_time = (end_time - start_time).total_seconds() * 1000  # Convert to milliseconds
-        
-        response = {
-            "results": results,
-            "metadata": {
-                "request_time": start_time.isoformat(),
+            processing_time = (time.perf_counter_ns() - start_ns) / 1e6  # Convert to milliseconds
+            metadata = {
+                "request_time": request_time,
                 "processing_time_ms": processing_time
             }
-        }
+            yield b'],"metadata":' + orjson.dumps(metadata) + b'}'
         
-        return jsonify(response)
+        return Response(stream_with_context(generate()), mimetype='application/json')
     
     except Exception as e:
-        current_app.logger.error(f"Error in batch_market_data: {str(e)}")
-        current_app.logger.error(traceback.format_exc())
+        current_app.logger.exception("Error in batch_market_data")
         return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
 
 
-@market_data_bp.route('/correlation', methods=['GET'])
+@market_data_bp.route('/correlation', methods=['GET'], strict_slashes=False)
 def get_correlation_matrix():
     """
     Get correlation matrix for specified assets.
@@ -371,25 +616,24 @@ def get_correlation_matrix():
         end_date = request.args.get('end_date')
         method = request.args.get('method', 'pearson')
         
-        # Validate required parameters
-        if not assets:
-            return jsonify({'error': 'Missing required parameter: assets'}), 400
+        # Validate required parameters; a list of only separators or blanks counts as missing
+        asset_list = parse_asset_list(assets)
+        if not asset_list:
+            return _error_response(_ERR_MISSING_ASSETS)
         
         if not start_date or not validate_date_format(start_date):
-            return jsonify({'error': 'Invalid or missing start_date parameter (YYYY-MM-DD format required)'}), 400
+            return _error_response(_ERR_INVALID_START_DATE)
         
         if not end_date or not validate_date_format(end_date):
-            return jsonify({'error': 'Invalid or missing end_date parameter (YYYY-MM-DD format required)'}), 400
+            return _error_response(_ERR_INVALID_END_DATE)
         
-        # Parse comma-separated parameters
-        asset_list = parse_comma_separated(assets)
+        # Validated YYYY-MM-DD strings order the same way as the dates they hold
+        if end_date < start_date:
+            return _error_response(_ERR_INVALID_DATE_RANGE)
         
         # Validate correlation method
-        valid_methods = ['pearson', 'spearman', 'kendall']
-        if method not in valid_methods:
-            return jsonify({
-                'error': f'Invalid method parameter. Must be one of: {", ".join(valid_methods)}'
-            }), 400
+        if method not in _VALID_METHOD_SET:
+            return _error_response(_ERR_INVALID_METHOD)
         
         # Here we would call the market data service to calculate correlation
         # For now, we'll return a placeholder response
@@ -402,36 +646,32 @@ def get_correlation_matrix():
         #     method=method
         # )
         
-        # Placeholder response for a correlation matrix
-        correlation_data = {}
-        for asset1 in asset_list:
-            correlation_data[asset1] = {}
-            for asset2 in asset_list:
-                # Diagonal elements are always 1.0
-                if asset1 == asset2:
-                    correlation_data[asset1][asset2] = 1.0
-                # Non-diagonal elements would be calculated based on historical data
-                else:
-                    # For placeholder, just set some random value
-                    correlation_data[asset1][asset2] = 0.5
-        
-        response = {
-            "data": correlation_data,
-            "metadata": {
-                "method": method,
-                "period_days": 365,  # This would be calculated based on start and end dates
-                "start_date": start_date,
-                "end_date": end_date
-            }
+        # Placeholder response for a correlation matrix. Non-diagonal elements would
+        # be calculated from historical returns (np.corrcoef over the returns matrix);
+        # for the placeholder they are a constant. Diagonal elements are always 1.0.
+        matrix = np.full((len(asset_list), len(asset_list)), 0.5)
+        np.fill_diagonal(matrix, 1.0)
+        correlation_data = {
+            asset: dict(zip(asset_list, row))
+            for asset, row in zip(asset_list, matrix.tolist())
         }
         
-        return jsonify(response)
+        template = _placeholder_template({"data": correlation_data})
+        response = _template_response(template, {
+            "method": method,
+            "period_days": _period_days(start_date, end_date),
+            "start_date": start_date,
+            "end_date": end_date
+        })
+        
+        return _cache_range_response(response, template, end_date)
     
     except Exception as e:
-        current_app.logger.error(f"Error in get_correlation_matrix: {str(e)}")
-        current_app.logger.error(traceback.format_exc())
+        current_app.logger.exception("Error in get_correlation_matrix")
         return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
 
 
-# Register the blueprint in app.py or similar entry point
+# Register the blueprint in app.py or similar entry point, together with the
+# orjson provider (src/api/json_provider.py) so jsonify() uses orjson:
+# app.json = ORJSONProvider(app)
 # app.register_blueprint(market_data_bp)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the orjson-backed Flask JSON provider.
+"""
+
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from flask import Flask, jsonify
+
+from src.api.json_provider import ORJSONProvider
+
+
+@pytest.fixture
+def app():
+    """Create a Flask app using the orjson provider."""
+    app = Flask(__name__)
+    app.json = ORJSONProvider(app)
+    return app
+
+
+@pytest.mark.parametrize('value, expected', [
+    # Naive datetimes are treated as UTC and written as ISO-8601, not RFC 822
+    (datetime(2023, 1, 2, 3, 4, 5), '"2023-01-02T03:04:05+00:00"'),
+    (datetime(2023, 1, 2, 3, 4, 5, tzinfo=timezone.utc), '"2023-01-02T03:04:05+00:00"'),
+    (date(2023, 1, 2), '"2023-01-02"'),
+    (Decimal('1.10'), '"1.10"'),
+    (np.array([1.5, 2.5]), '[1.5,2.5]'),
+    (np.float64(0.25), '0.25'),
+])
+def test_dumps_wire_format(app, value, expected):
+    """Values outside plain JSON types serialize to the documented formats."""
+    assert app.json.dumps(value) == expected
+
+
+def test_dumps_sorts_keys_and_indents(app):
+    """sort_keys and indent follow Flask's provider settings."""
+    assert app.json.dumps({'b': 1, 'a': 2}) == '{"a":2,"b":1}'
+    assert app.json.dumps({'a': 1}, indent=2) == '{\n  "a": 1\n}'
+
+
+def test_dumps_uses_to_dict(app):
+    """Model objects are serialized through their to_dict()."""
+    class Model:
+        def to_dict(self):
+            return {'id': 1}
+
+    assert app.json.dumps(Model()) == '{"id":1}'
+
+
+def test_dumps_rejects_unknown_types(app):
+    """Unsupported objects raise TypeError like the default provider."""
+    with pytest.raises(TypeError):
+        app.json.dumps(object())
+
+
+def test_loads_accepts_str_and_bytes(app):
+    """loads() decodes both text and raw bytes."""
+    assert app.json.loads('{"a": [1, 2]}') == {'a': [1, 2]}
+    assert app.json.loads(b'{"a": null}') == {'a': None}
+
+
+def test_jsonify_round_trips(app):
+    """jsonify() goes through the provider and produces a JSON response."""
+    with app.app_context():
+        response = jsonify({'when': datetime(2023, 1, 2)})
+
+    assert response.mimetype == 'application/json'
+    assert response.get_json() == {'when': '2023-01-02T00:00:00+00:00'}
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Tests for the market data API routes.
+
+These tests exercise the blueprint through the Flask test client; they do not
+need Supabase credentials since the routes still serve placeholder data.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+
+import orjson
+import pytest
+from flask import Flask, current_app
+
+from src.api import market_data_routes
+from src.api.json_provider import ORJSONProvider
+from src.api.market_data_routes import market_data_bp
+
+
+@pytest.fixture
+def app():
+    """Create a Flask app with the market data blueprint registered."""
+    app = Flask(__name__)
+    app.json = ORJSONProvider(app)
+    app.register_blueprint(market_data_bp)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    """Create a test client for the app."""
+    return app.test_client()
+
+
+def post_batch(client, requests):
+    """POST a batch body and return the response with its fully streamed JSON payload."""
+    response = client.post('/api/data/market/batch', json={'requests': requests})
+    return response, orjson.loads(response.get_data())
+
+
+def test_batch_streams_results_in_request_order(client):
+    """The streamed body parses as one document with results in input order."""
+    response, body = post_batch(client, [
+        {'type': 'latest', 'assets': ['AAPL']},
+        {'type': 'historical', 'assets': ['AAPL']},
+        {'type': 'metrics', 'assets': ['AAPL']},
+    ])
+
+    assert response.status_code == 200
+    # Streamed responses are sent without a precomputed Content-Length
+    assert 'Content-Length' not in response.headers
+    assert response.mimetype == 'application/json'
+    assert [result['type'] for result in body['results']] == ['latest', 'historical', 'metrics']
+    assert set(body['metadata']) == {'request_time', 'processing_time_ms'}
+    assert body['metadata']['processing_time_ms'] >= 0
+
+
+def test_batch_emits_each_result_as_its_own_chunk(client):
+    """The body is produced incrementally: an opening chunk, one chunk per result, then metadata."""
+    response = client.post('/api/data/market/batch', json={
+        'requests': [{'type': 'latest'}, {'type': 'metrics'}, {'type': 'historical'}]
+    }, buffered=False)
+
+    chunks = list(response.response)
+
+    assert chunks[0] == b'{"results":['
+    assert [orjson.loads(chunk.lstrip(b','))['type'] for chunk in chunks[1:4]] == ['latest', 'metrics', 'historical']
+    assert chunks[4].startswith(b'],"metadata":')
+    assert len(chunks) == 5
+
+
+def test_batch_closes_the_document_when_a_result_cannot_be_serialized(client, monkeypatch):
+    """A failure after streaming has started still leaves a parseable body carrying the error."""
+    def unserializable_handler(item):
+        return {'type': item.type, 'data': object()}
+
+    monkeypatch.setitem(market_data_routes._BATCH_HANDLERS, 'metrics', unserializable_handler)
+
+    response, body = post_batch(client, [{'type': 'latest'}, {'type': 'metrics'}, {'type': 'historical'}])
+
+    assert response.status_code == 200
+    assert [result['type'] for result in body['results']] == ['latest']
+    assert body['error'] == 'Internal server error'
+    assert 'metadata' not in body
+
+
+def test_batch_reports_invalid_items_without_failing_the_batch(client):
+    """Items without a usable type get an error entry in their slot."""
+    _, body = post_batch(client, [
+        {'assets': ['AAPL']},
+        {'type': 'unknown'},
+        'not-an-object',
+        {'type': 'latest'},
+    ])
+
+    results = body['results']
+    assert len(results) == 4
+    assert results[0] == {'error': 'Each request must specify a "type".', 'request': {'assets': ['AAPL']}}
+    assert results[1]['error'] == 'Unsupported request type: unknown'
+    assert results[2]['request'] == 'not-an-object'
+    assert results[3]['type'] == 'latest'
+
+
+def test_batch_captures_handler_exceptions_per_item(client, monkeypatch):
+    """A handler that raises in a pool worker only fails its own item."""
+    def failing_handler(item):
+        raise RuntimeError('boom')
+
+    monkeypatch.setitem(market_data_routes._BATCH_HANDLERS, 'metrics', failing_handler)
+
+    response, body = post_batch(client, [
+        {'type': 'latest'},
+        {'type': 'metrics', 'assets': ['AAPL']},
+        {'type': 'historical'},
+    ])
+
+    assert response.status_code == 200
+    results = body['results']
+    assert results[0]['type'] == 'latest'
+    assert results[1] == {
+        'error': 'Internal server error',
+        'message': 'boom',
+        'request': {'type': 'metrics', 'assets': ['AAPL']}
+    }
+    assert results[2]['type'] == 'historical'
+    assert 'metadata' in body
+
+
+def test_batch_handlers_run_with_an_app_context(client, app, monkeypatch):
+    """Handlers on pool threads can reach current_app, as the service-backed handlers will."""
+    def app_name_handler(item):
+        return {'type': item.type, 'app': current_app.name}
+
+    monkeypatch.setitem(market_data_routes._BATCH_HANDLERS, 'latest', app_name_handler)
+
+    _, body = post_batch(client, [{'type': 'latest'}] * 3)
+
+    assert body['results'] == [{'type': 'latest', 'app': app.name}] * 3
+
+
+def test_batch_keeps_at_most_a_window_of_sub_requests_in_flight(client, monkeypatch):
+    """A large batch never has more than _BATCH_WINDOW sub-requests queued or running."""
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+    original_submit = market_data_routes._BATCH_POOL.submit
+
+    def counting_submit(fn, *args):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        return original_submit(fn, *args)
+
+    def slow_handler(item):
+        nonlocal in_flight
+        time.sleep(0.002)
+        with lock:
+            in_flight -= 1
+        return {'type': item.type}
+
+    monkeypatch.setattr(market_data_routes, '_BATCH_WINDOW', 4)
+    monkeypatch.setattr(market_data_routes._BATCH_POOL, 'submit', counting_submit)
+    monkeypatch.setitem(market_data_routes._BATCH_HANDLERS, 'latest', slow_handler)
+
+    _, body = post_batch(client, [{'type': 'latest'}] * 40)
+
+    assert len(body['results']) == 40
+    assert 1 < peak <= 4
+
+
+def test_batch_with_no_requests_returns_empty_results(client):
+    """An empty requests array still yields a complete document."""
+    response, body = post_batch(client, [])
+
+    assert response.status_code == 200
+    assert body['results'] == []
+    assert 'metadata' in body
+
+
+@pytest.mark.parametrize('data', [b'{bad', b''])
+def test_batch_rejects_malformed_or_empty_body(client, data):
+    """Undecodable bodies are a 400, not a 500."""
+    response = client.post('/api/data/market/batch', data=data, content_type='application/json')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Malformed JSON in request body.'}
+
+
+@pytest.mark.parametrize('payload, error', [
+    ({}, 'Invalid request body. Must contain "requests" array.'),
+    ([], 'Invalid request body. Must contain "requests" array.'),
+    ({'requests': 3}, '"requests" must be an array.'),
+])
+def test_batch_rejects_invalid_body_shape(client, payload, error):
+    """Well-formed JSON without a requests array is rejected."""
+    response = client.post('/api/data/market/batch', json=payload)
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': error}
+
+
+def test_trailing_slash_routes_resolve(client):
+    """Trailing-slash URLs are served directly rather than redirected or 404'd."""
+    latest = client.get('/api/data/market/latest/?assets=AAPL')
+    batch = client.post('/api/data/market/batch/', json={'requests': [{'type': 'latest'}]})
+
+    assert latest.status_code == 200
+    assert latest.get_json()['data']
+    assert batch.status_code == 200
+    assert orjson.loads(batch.get_data())['results'][0]['type'] == 'latest'
+
+
+@pytest.mark.parametrize('path', ['', '/metrics', '/correlation'])
+@pytest.mark.parametrize('start_date', [
+    '2023-1-5',
+    '2023-01-5',
+    '23-01-05',
+    '2023-13-01',
+    '2023-02-30',
+    '2023-01-01T00:00:00',
+    '2023-01-01\n',
+])
+def test_date_params_require_strict_yyyy_mm_dd(client, path, start_date):
+    """Dates must be zero-padded, real calendar dates with nothing trailing."""
+    response = client.get(f'/api/data/market{path}', query_string={
+        'assets': 'AAPL', 'start_date': start_date, 'end_date': '2023-03-01'
+    })
+
+    assert response.status_code == 400
+    assert response.get_json() == {
+        'error': 'Invalid or missing start_date parameter (YYYY-MM-DD format required)'
+    }
+
+
+@pytest.mark.parametrize('path', ['', '/latest', '/metrics', '/correlation'])
+@pytest.mark.parametrize('assets', ['', ',,', ' ', ' , ,'])
+def test_asset_list_without_symbols_is_missing(client, path, assets):
+    """An assets value with only separators or blanks counts as missing."""
+    response = client.get(f'/api/data/market{path}', query_string={
+        'assets': assets, 'start_date': '2023-01-01', 'end_date': '2023-03-01'
+    })
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Missing required parameter: assets'}
+
+
+@pytest.mark.parametrize('assets, expected', [
+    ('aapl', ['AAPL']),
+    ('aapl,AAPL', ['AAPL']),
+    (' msft , aapl,MSFT,', ['MSFT', 'AAPL']),
+])
+def test_asset_symbols_are_upper_cased_and_deduplicated(client, assets, expected):
+    """Symbols are canonicalized to upper case and repeated symbols collapse, keeping first-seen order."""
+    correlation = client.get('/api/data/market/correlation', query_string={
+        'assets': assets, 'start_date': '2023-01-01', 'end_date': '2023-03-01'
+    }).get_json()
+    market_data = client.get('/api/data/market', query_string={
+        'assets': assets, 'start_date': '2023-01-01', 'end_date': '2023-03-01'
+    }).get_json()
+
+    assert list(correlation['data']) == expected
+    assert list(correlation['data'][expected[0]]) == expected
+    assert market_data['metadata']['count'] == len(expected)
+
+
+@pytest.mark.parametrize('start_date, end_date, period_days', [
+    ('2023-01-01', '2023-01-01', 0),
+    ('2023-01-01', '2023-03-01', 59),
+    ('2024-02-01', '2024-03-01', 29),
+    ('2022-12-31', '2023-12-31', 365),
+])
+def test_period_days_is_computed_from_the_range(client, start_date, end_date, period_days):
+    """period_days is the number of days between start_date and end_date."""
+    query = {'assets': 'AAPL', 'start_date': start_date, 'end_date': end_date}
+
+    for path in ('', '/metrics', '/correlation'):
+        response = client.get(f'/api/data/market{path}', query_string=query)
+        assert response.get_json()['metadata']['period_days'] == period_days
+
+
+@pytest.mark.parametrize('path', ['', '/metrics', '/correlation'])
+def test_reversed_date_range_is_rejected(client, path):
+    """A range that ends before it starts is a 400 and is not cached."""
+    response = client.get(f'/api/data/market{path}', query_string={
+        'assets': 'AAPL', 'start_date': '2023-02-01', 'end_date': '2023-01-01'
+    })
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid date range: end_date must not be before start_date'}
+    assert 'Cache-Control' not in response.headers
+
+
+CLOSED_RANGE = {'assets': 'AAPL', 'start_date': '2023-01-01', 'end_date': '2023-03-01'}
+OPEN_RANGE = {'assets': 'AAPL', 'start_date': '2023-01-01', 'end_date': '2099-01-01'}
+
+
+@pytest.mark.parametrize('path, query', [
+    ('/latest', {'assets': 'AAPL'}),
+    ('', CLOSED_RANGE),
+    ('/metrics', OPEN_RANGE),
+    ('/correlation', CLOSED_RANGE),
+])
+def test_repeat_request_with_etag_returns_304(client, path, query):
+    """A conditional GET carrying the previous ETag is answered with an empty 304."""
+    first = client.get(f'/api/data/market{path}', query_string=query)
+    etag = first.headers['ETag']
+    second = client.get(f'/api/data/market{path}', query_string=query, headers={'If-None-Match': etag})
+
+    assert first.status_code == 200
+    assert etag.startswith('W/')
+    assert second.status_code == 304
+    assert second.get_data() == b''
+    assert second.headers['ETag'] == etag
+
+
+@pytest.mark.parametrize('path, query, max_age', [
+    ('/latest', {'assets': 'AAPL'}, 60),
+    ('', OPEN_RANGE, 60),
+    ('', CLOSED_RANGE, 600),
+    ('/metrics', OPEN_RANGE, 60),
+    ('/metrics', CLOSED_RANGE, 600),
+    ('/correlation', OPEN_RANGE, 60),
+    ('/correlation', CLOSED_RANGE, 600),
+])
+def test_cache_control_max_age(client, path, query, max_age):
+    """/latest and open ranges get the short lifetime; ranges that already ended get the longer one."""
+    response = client.get(f'/api/data/market{path}', query_string=query)
+
+    assert response.headers['Cache-Control'] == f'public, max-age={max_age}'
+
+
+def test_range_ending_today_utc_is_open(client):
+    """A range ending on the current UTC date is still open."""
+    today = datetime.now(timezone.utc).date().isoformat()
+    response = client.get('/api/data/market', query_string={
+        'assets': 'AAPL', 'start_date': '2023-01-01', 'end_date': today
+    })
+
+    assert response.headers['Cache-Control'] == 'public, max-age=60'
+
+
+def test_etag_ignores_per_request_metadata(client, monkeypatch):
+    """The /latest ETag doesn't change when only the metadata timestamp does."""
+    monkeypatch.setattr(market_data_routes, '_now_iso', lambda: '2023-05-01T00:00:00')
+    first = client.get('/api/data/market/latest', query_string={'assets': 'AAPL'})
+    monkeypatch.setattr(market_data_routes, '_now_iso', lambda: '2023-05-01T00:00:01')
+    second = client.get('/api/data/market/latest', query_string={'assets': 'AAPL'})
+
+    assert first.get_data() != second.get_data()
+    assert first.headers['ETag'] == second.headers['ETag']
+
+
+def test_etag_changes_with_response_version(client, monkeypatch):
+    """Bumping _RESPONSE_VERSION invalidates ETags clients already hold."""
+    before = client.get('/api/data/market', query_string=CLOSED_RANGE).headers['ETag']
+    monkeypatch.setattr(market_data_routes, '_RESPONSE_VERSION', b'test-bump')
+    after = client.get('/api/data/market', query_string=CLOSED_RANGE, headers={'If-None-Match': before})
+
+    assert after.status_code == 200
+    assert after.headers['ETag'] != before
+
+
+ERROR_BODIES = sorted(name for name in vars(market_data_routes) if name.startswith('_ERR_'))
+
+
+@pytest.mark.parametrize('name', ERROR_BODIES)
+def test_pre_serialized_error_bodies_are_json(name):
+    """Every pre-serialized error body is a JSON object with a string error message."""
+    body = orjson.loads(getattr(market_data_routes, name))
+
+    assert list(body) == ['error']
+    assert isinstance(body['error'], str) and body['error']
+
+
+@pytest.mark.parametrize('path, query, error', [
+    ('', {}, 'Missing required parameter: assets'),
+    ('/metrics', {'assets': 'AAPL', 'end_date': '2023-01-01'}, 'Invalid or missing start_date parameter (YYYY-MM-DD format required)'),
+    ('/correlation', {'assets': 'AAPL', 'start_date': '2023-01-01'}, 'Invalid or missing end_date parameter (YYYY-MM-DD format required)'),
+    ('', {'assets': 'AAPL', 'start_date': '2023-01-01', 'end_date': '2023-02-01', 'frequency': 'hourly'},
+     'Invalid frequency parameter. Must be one of: daily, weekly, monthly'),
+    ('/correlation', {'assets': 'AAPL', 'start_date': '2023-01-01', 'end_date': '2023-02-01', 'method': 'x'},
+     'Invalid method parameter. Must be one of: pearson, spearman, kendall'),
+])
+def test_validation_errors_are_served_as_json(client, path, query, error):
+    """Validation failures return the pre-serialized body as a JSON 400."""
+    response = client.get(f'/api/data/market{path}', query_string=query)
+
+    assert response.status_code == 400
+    assert response.mimetype == 'application/json'
+    assert response.get_json() == {'error': error}
+
+
+@pytest.mark.parametrize('path, query, data_keys, metadata_keys', [
+    ('', CLOSED_RANGE, ['AAPL'], {'frequency', 'source', 'last_updated', 'count', 'period_days'}),
+    ('/latest', {'assets': 'AAPL'}, ['AAPL'], {'timestamp', 'source'}),
+    ('/metrics', CLOSED_RANGE, ['AAPL'], {'period_days', 'calculation_time'}),
+    ('/correlation', {**CLOSED_RANGE, 'assets': 'AAPL,MSFT'}, ['AAPL', 'MSFT'], {'method', 'period_days', 'start_date', 'end_date'}),
+])
+def test_template_bodies_are_json(client, path, query, data_keys, metadata_keys):
+    """Bodies spliced from a pre-serialized template and per-request metadata parse as one JSON document."""
+    response = client.get(f'/api/data/market{path}', query_string=query)
+    body = orjson.loads(response.get_data())
+
+    assert response.mimetype == 'application/json'
+    assert list(body['data']) == data_keys
+    assert set(body['metadata']) == metadata_keys
+
+
+def test_template_response_escapes_metadata():
+    """Metadata spliced into a template is JSON-encoded, so quotes and control characters stay valid."""
+    template = market_data_routes._placeholder_template({'data': {'a': [1, 2]}, 'extra': None})
+    response = market_data_routes._template_response(template, {'note': 'say "hi"\n', 'n': 1.5})
+
+    assert orjson.loads(response.get_data()) == {
+        'data': {'a': [1, 2]},
+        'extra': None,
+        'metadata': {'note': 'say "hi"\n', 'n': 1.5}
+    }
+
+
+@pytest.mark.parametrize('item, error', [
+    ({'type': 'historical', 'assets': 'AAPL'}, '"assets" must be an array of strings.'),
+    ({'type': 'historical', 'assets': ['AAPL', 1]}, '"assets" must be an array of strings.'),
+    ({'type': 'historical', 'start_date': '2023-1-5'}, 'Invalid start_date (YYYY-MM-DD format required).'),
+    ({'type': 'historical', 'end_date': 20230101}, 'Invalid end_date (YYYY-MM-DD format required).'),
+    ({'type': 'historical', 'start_date': '2023-02-01', 'end_date': '2023-01-01'},
+     'Invalid date range: end_date must not be before start_date.'),
+    ({'type': 'historical', 'frequency': 'hourly'}, 'Invalid frequency. Must be one of: daily, weekly, monthly.'),
+])
+def test_batch_items_are_validated(client, item, error):
+    """Invalid fields in a sub-request produce a per-item error; the rest of the batch still runs."""
+    _, body = post_batch(client, [item, {'type': 'latest'}])
+
+    assert body['results'][0] == {'error': error, 'request': item}
+    assert body['results'][1]['type'] == 'latest'
+
+
+def test_batch_request_canonicalizes_assets():
+    """Valid items are converted once, with assets upper-cased and deduplicated."""
+    item = market_data_routes.BatchRequest.from_dict({
+        'type': 'historical', 'assets': ['aapl', ' AAPL', 'msft', ''], 'start_date': '2023-01-01'
+    })
+
+    assert item.assets == ['AAPL', 'MSFT']
+    assert item.start_date == '2023-01-01'
+    assert item.end_date is None
+    assert item.frequency == 'daily'